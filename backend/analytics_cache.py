@@ -0,0 +1,129 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+# Owner analytics result cache.
+# Rendered /api/owner/stats and /api/owner/analytics/detailed payloads are cached
+# per owner and per range under a key that embeds the owner's version number.
+# Booking writes bump the version (invalidate()), which orphans every cached
+# payload of that owner at once; orphaned entries age out of the LRU / TTL.
+#
+# Stores share a tiny interface: get(key), set(key, value, ttl), add(key, value, ttl)
+# (set only if absent, True when it did), delete(key), get_counter(key) and incr(key).
+# Counters are never evicted, so a version can not roll back. idempotency.py keeps
+# its request records in the same stores.
+#   LRUStore     in-process, the default (each worker has its own copy)
+#   RedisStore   shared between workers, enabled with ANALYTICS_CACHE_URL=redis://...
+
+
+class LRUStore:
+    """In-process LRU with per-entry TTL"""
+
+    def __init__(self, max_entries=2000):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.counters = {}
+        self.lock = threading.RLock()  # Reentrant: add() calls get() and set() while holding it
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        with self.lock:
+            self.entries[key] = (value, time.time() + ttl if ttl else None)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def add(self, key, value, ttl=None):
+        with self.lock:
+            if self.get(key) is not None:
+                return False
+            self.set(key, value, ttl)
+            return True
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def get_counter(self, key):
+        return self.counters.get(key, 0)
+
+    def incr(self, key):
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + 1
+            return self.counters[key]
+
+
+class RedisStore:
+    """Shared store on Redis (needs the `redis` package)"""
+
+    def __init__(self, url):
+        import redis
+        self.client = redis.Redis.from_url(url)
+
+    def get(self, key):
+        raw = self.client.get(key)
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key, value, ttl=None):
+        self.client.set(key, json.dumps(value), ex=ttl)
+
+    def add(self, key, value, ttl=None):
+        return bool(self.client.set(key, json.dumps(value), ex=ttl, nx=True))
+
+    def delete(self, key):
+        self.client.delete(key)
+
+    def get_counter(self, key):
+        return int(self.client.get(key) or 0)
+
+    def incr(self, key):
+        return self.client.incr(key)
+
+
+class AnalyticsCache:
+    """Per (owner, view, params) payload cache with owner version invalidation and hit/miss counters"""
+
+    def __init__(self, store=None, ttl_seconds=60):
+        self.store = store or LRUStore()
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, owner_id, view, params=''):
+        """Returns (key, payload or None). Pass the same key to set() so a payload computed
+        while a booking write lands is stored under the old, already orphaned, version."""
+        version = self.store.get_counter(f'owner_analytics:{owner_id}:version')
+        key = f'owner_analytics:{owner_id}:{version}:{view}:{params}'
+        value = self.store.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return key, value
+
+    def set(self, key, value):
+        self.store.set(key, value, self.ttl_seconds)
+
+    def invalidate(self, owner_id):
+        self.store.incr(f'owner_analytics:{owner_id}:version')
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'store': type(self.store).__name__,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0
+        }
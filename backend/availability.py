@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta
+
+# Bitmap availability engine.
+# A unit-day is a fixed grid of TICK_MINUTES ticks; bit i of the occupancy mask is
+# set when tick i is taken by a live booking. Bookings are OR-ed in as bit ranges
+# and a slot of any duration (30/60/90 mins, walk-ins of 45 mins...) is free when
+# the AND of its range with the mask is zero.
+
+TICK_MINUTES = 5
+TICKS_PER_DAY = 24 * 60 // TICK_MINUTES
+
+
+def day_start(day):
+    return datetime.combine(day, datetime.min.time())
+
+
+def wall_time(moment):
+    """Bookings are stored as naive wall-clock times; drop any offset a client sent"""
+    return moment.replace(tzinfo=None) if moment.tzinfo else moment
+
+
+def to_tick(day, moment, round_up=False):
+    """Tick index of a datetime within a day, clamped to [0, TICKS_PER_DAY]"""
+    seconds = (wall_time(moment) - day_start(day)).total_seconds()
+    tick_seconds = TICK_MINUTES * 60
+    tick = -(-seconds // tick_seconds) if round_up else seconds // tick_seconds
+    return int(min(max(tick, 0), TICKS_PER_DAY))
+
+
+def span_mask(day, start_time, end_time):
+    """Bit range covering [start_time, end_time) on a day (0 if it does not touch the day)"""
+    start_tick = to_tick(day, start_time)
+    end_tick = to_tick(day, end_time, round_up=True)
+    if end_tick <= start_tick:
+        return 0
+    return ((1 << (end_tick - start_tick)) - 1) << start_tick
+
+
+def build_day_mask(day, bookings):
+    """Occupancy mask of a unit-day from its live bookings"""
+    mask = 0
+    for b in bookings:
+        mask |= span_mask(day, b.start_time, b.end_time)
+    return mask
+
+
+def window_is_free(mask, day, start_time, end_time):
+    return mask & span_mask(day, start_time, end_time) == 0
+
+
+def days_spanned(start_time, end_time):
+    """Every date touched by [start_time, end_time)"""
+    start_time, end_time = wall_time(start_time), wall_time(end_time)
+    days = []
+    day = start_time.date()
+    while day_start(day) < end_time:
+        days.append(day)
+        day = day + timedelta(days=1)
+    return days or [start_time.date()]
+
+
+class AvailabilityCache:
+    """Per (unit_id, date) occupancy masks with an expiry time.
+
+    Entries expire after ttl_seconds, or earlier when a hold inside them lapses, so
+    other workers' writes show up within the TTL. Booking writes in this process call
+    invalidate() for the unit-days they touch."""
+
+    def __init__(self, ttl_seconds=30, max_entries=50000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.entries = {}
+
+    def get(self, unit_id, day, now):
+        entry = self.entries.get((unit_id, day))
+        if entry and entry[1] > now:
+            return entry[0]
+        return None
+
+    def put(self, unit_id, day, mask, now, expires_at=None):
+        valid_until = now + timedelta(seconds=self.ttl_seconds)
+        if expires_at and expires_at < valid_until:
+            valid_until = expires_at
+        if len(self.entries) >= self.max_entries:
+            self.entries = {k: v for k, v in self.entries.items() if v[1] > now}
+            if len(self.entries) >= self.max_entries:
+                self.entries.clear()
+        self.entries[(unit_id, day)] = (mask, valid_until)
+
+    def invalidate(self, unit_id, start_time, end_time):
+        for day in days_spanned(start_time, end_time):
+            self.entries.pop((unit_id, day), None)
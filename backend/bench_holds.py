@@ -0,0 +1,146 @@
+"""Concurrent hold benchmark.
+
+Seeds a throwaway turf, then has many threads race /api/bookings/hold for the
+same few slots at once through the test client. Prints holds/sec and the
+201/409/error counts, then checks that no unit ended up with two live bookings
+overlapping in time. Exits with status 1 if it finds a double booking.
+
+    python bench_holds.py                      # temporary SQLite database
+    python bench_holds.py --database-url postgresql://.../turfics_bench
+    python bench_holds.py --unlocked           # skip lock_unit_days, to see the race it prevents
+
+The target database must not contain any bookings: it is seeded from scratch.
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument('--database-url', help='Empty scratch database to seed (default: temporary SQLite file)')
+parser.add_argument('--threads', type=int, default=16, help='Concurrent clients')
+parser.add_argument('--units', type=int, default=3, help='Units on the benchmark turf (holds per slot that can succeed)')
+parser.add_argument('--slots', type=int, default=24, help='Distinct hourly slots the clients fight over')
+parser.add_argument('--rounds', type=int, default=4, help='Hold requests per client per slot')
+parser.add_argument('--unlocked', action='store_true', help='Disable lock_unit_days (demonstrates double booking)')
+args = parser.parse_args()
+
+if args.database_url:
+    os.environ['DATABASE_URL'] = args.database_url
+else:
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'hold_bench.db')
+
+with contextlib.redirect_stdout(io.StringIO()):
+    import app as turfics  # noqa: E402  (DATABASE_URL must be set first)
+from models import db, User, Turf, TurfGame, TurfUnit, Booking  # noqa: E402
+from flask_jwt_extended import create_access_token  # noqa: E402
+from sqlalchemy.orm import aliased  # noqa: E402
+
+
+def seed():
+    owner = User(username='bench_owner', email='bench_owner@turfics.test', role='owner', password_hash='x')
+    db.session.add(owner)
+    db.session.flush()
+    turf = Turf(name='Bench Turf', location='Bench City', owner_id=owner.id,
+                latitude=12.9, longitude=77.6, status='active', opening_time='00:00', closing_time='23:59')
+    db.session.add(turf)
+    db.session.flush()
+    game = TurfGame(turf_id=turf.id, sport_type='Football', default_price=800, slot_duration=60)
+    db.session.add(game)
+    db.session.flush()
+    for u in range(args.units):
+        db.session.add(TurfUnit(turf_game_id=game.id, name=f'Unit {u}', unit_type='COURT'))
+
+    players = [User(username=f'bench_player_{i}', email=f'bench_player_{i}@turfics.test', role='user', password_hash='x')
+               for i in range(args.threads)]
+    db.session.add_all(players)
+    db.session.commit()
+    return turf.id, [p.id for p in players]
+
+
+def double_bookings():
+    """Pairs of live bookings on the same unit that overlap in time"""
+    now = datetime.utcnow()
+    other = aliased(Booking)
+    return db.session.query(Booking.id, other.id, Booking.turf_unit_id)\
+        .join(other, db.and_(
+            other.turf_unit_id == Booking.turf_unit_id,
+            other.id > Booking.id,
+            other.start_time < Booking.end_time,
+            other.end_time > Booking.start_time
+        ))\
+        .filter(turfics.live_booking_filter(now),
+                other.status.notin_(turfics.INACTIVE_BOOKING_STATUSES),
+                db.or_(other.expires_at.is_(None), other.expires_at > now))\
+        .all()
+
+
+def db_name():
+    return os.environ['DATABASE_URL'].split(':', 1)[0]
+
+
+def main():
+    if args.unlocked:
+        turfics.lock_unit_days = lambda unit_ids, days: None
+
+    with turfics.app.app_context():
+        db.create_all()
+        if db.session.query(Booking.id).first():
+            sys.exit('Refusing to run: the target database already contains bookings.')
+        turf_id, player_ids = seed()
+        tokens = [{'Authorization': 'Bearer ' + create_access_token(identity=str(p), additional_claims={'role': 'user'})}
+                  for p in player_ids]
+
+    day = (datetime.utcnow() + timedelta(days=7)).strftime('%Y-%m-%d')
+    results = Counter()
+    results_lock = threading.Lock()
+    start_gate = threading.Barrier(args.threads)
+
+    def client_loop(headers):
+        client = turfics.app.test_client()
+        local = Counter()
+        start_gate.wait()
+        # Every client walks the same slots in the same order, so each slot is contended by all of them
+        for hour in range(args.slots):
+            for _ in range(args.rounds):
+                response = client.post('/api/bookings/hold', json={'turf_id': turf_id, 'date': day, 'hour': hour},
+                                       headers=headers)
+                local[response.status_code] += 1
+        with results_lock:
+            results.update(local)
+
+    threads = [threading.Thread(target=client_loop, args=(headers,)) for headers in tokens]
+    with contextlib.redirect_stdout(io.StringIO()):  # routes print debug output
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+
+    requests_made = sum(results.values())
+    print(f"{db_name()}: {args.threads} clients, {args.units} units, {args.slots} slots, "
+          f"{'unlocked' if args.unlocked else 'locked'}")
+    print(f"  {requests_made} hold requests in {elapsed:.2f}s ({requests_made / elapsed:.1f} req/s)")
+    print(f"  {results[201]} holds ({results[201] / elapsed:.1f} holds/s), {results[409]} conflicts, "
+          f"{requests_made - results[201] - results[409]} errors {dict(results)}")
+
+    with turfics.app.app_context():
+        doubles = double_bookings()
+        expected = args.units * args.slots
+        print(f"  {results[201]} holds for {expected} unit-slots")
+        if doubles:
+            print(f"FAILED: {len(doubles)} double bookings, e.g. bookings {doubles[0][0]} and {doubles[0][1]} "
+                  f"on unit {doubles[0][2]}")
+            sys.exit(1)
+    print('OK: no double bookings')
+
+
+if __name__ == '__main__':
+    main()
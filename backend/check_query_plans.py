@@ -0,0 +1,177 @@
+"""Query plan check for the booking hot paths.
+
+Seeds a large throwaway dataset, drives the slot, hold, my-bookings and owner
+stats routes through the test client, captures every SELECT they run against
+`bookings` and prints its EXPLAIN plan. Exits with status 1 if any of them falls
+back to a full scan of the bookings table, so a dropped or unusable index is
+caught before deploy.
+
+    python check_query_plans.py                      # temporary SQLite database
+    python check_query_plans.py --database-url postgresql://.../turfics_plancheck
+
+The target database must not contain any bookings: it is seeded from scratch.
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import re
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument('--database-url', help='Empty scratch database to seed (default: temporary SQLite file)')
+parser.add_argument('--bookings', type=int, default=100000, help='Number of bookings to seed')
+parser.add_argument('--turfs', type=int, default=200, help='Number of turfs to seed')
+parser.add_argument('--players', type=int, default=2000, help='Number of players to seed')
+args = parser.parse_args()
+
+if args.database_url:
+    os.environ['DATABASE_URL'] = args.database_url
+else:
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'query_plan_check.db')
+
+import app as turfics  # noqa: E402  (DATABASE_URL must be set first)
+from models import db, User, Turf, TurfGame, TurfUnit, Booking  # noqa: E402
+from flask_jwt_extended import create_access_token  # noqa: E402
+from sqlalchemy import event, insert  # noqa: E402
+
+# Plans that mean "read every row of bookings"
+FULL_SCAN_PATTERNS = [
+    re.compile(r'\bSCAN bookings\b(?! USING)'),  # SQLite (SCAN ... USING INDEX is fine)
+    re.compile(r'Seq Scan on bookings\b'),  # PostgreSQL
+]
+
+
+def seed(now):
+    random.seed(42)
+    owner = User(username='plan_owner', email='plan_owner@turfics.test', role='owner', password_hash='x')
+    db.session.add(owner)
+    db.session.flush()
+
+    db.session.execute(insert(User), [{
+        'username': f'plan_player_{i}', 'email': f'plan_player_{i}@turfics.test',
+        'role': 'user', 'password_hash': 'x'
+    } for i in range(args.players)])
+    player_ids = [u.id for u in User.query.filter(User.role == 'user').all()]
+
+    unit_ids = []
+    unit_turf = {}
+    for t in range(args.turfs):
+        # Only the first turf belongs to plan_owner, the rest are other venues' data
+        turf = Turf(name=f'Plan Turf {t}', location='Plan City', owner_id=owner.id if t == 0 else None,
+                    latitude=12.9 + t * 0.001, longitude=77.6, status='active')
+        db.session.add(turf)
+        db.session.flush()
+        for sport in ['Football', 'Badminton']:
+            game = TurfGame(turf_id=turf.id, sport_type=sport, default_price=800, slot_duration=60)
+            db.session.add(game)
+            db.session.flush()
+            for u in range(3):
+                unit = TurfUnit(turf_game_id=game.id, name=f'Unit {u}', unit_type='COURT')
+                db.session.add(unit)
+                db.session.flush()
+                unit_ids.append(unit.id)
+                unit_turf[unit.id] = turf.id
+
+    statuses = ['confirmed'] * 6 + ['completed'] * 2 + ['cancelled', 'pending', 'held', 'expired']
+    rows = []
+    for i in range(args.bookings):
+        unit_id = random.choice(unit_ids)
+        start = now.replace(minute=0, second=0, microsecond=0) + \
+            timedelta(days=random.randint(-365, 60), hours=random.randint(-12, 12))
+        status = random.choice(statuses)
+        rows.append({
+            'user_id': random.choice(player_ids),
+            'turf_unit_id': unit_id,
+            'turf_id': unit_turf[unit_id],
+            'start_time': start,
+            'end_time': start + timedelta(hours=1),
+            'total_price': 800,
+            'status': status,
+            'booking_source': random.choice(['online', 'online', 'walk-in']),
+            'expires_at': start - timedelta(days=1) if status == 'held' else None,
+            'created_at': start - timedelta(days=random.randint(0, 14)),
+        })
+        if len(rows) == 5000:
+            db.session.execute(insert(Booking), rows)
+            rows = []
+    if rows:
+        db.session.execute(insert(Booking), rows)
+    db.session.commit()
+    return owner, player_ids[0], unit_ids[0], unit_turf[unit_ids[0]]
+
+
+def explain(statement, parameters):
+    prefix = 'EXPLAIN QUERY PLAN ' if db.engine.dialect.name == 'sqlite' else 'EXPLAIN '
+    with db.engine.connect() as conn:
+        rows = conn.exec_driver_sql(prefix + statement, parameters).fetchall()
+    # SQLite: (id, parent, notused, detail) / PostgreSQL: (line,)
+    return [str(row[-1]) for row in rows]
+
+
+def main():
+    with turfics.app.app_context():
+        db.create_all()
+        if db.session.query(Booking.id).first():
+            sys.exit('Refusing to run: the target database already contains bookings.')
+
+        now = datetime.utcnow()
+        print(f"Seeding {args.bookings} bookings across {args.turfs} turfs ({db.engine.dialect.name})...")
+        owner, player_id, unit_id, turf_id = seed(now)
+        db.session.execute(db.text('ANALYZE'))  # fresh planner statistics
+        db.session.commit()
+
+        def token(user_id, role):
+            return {'Authorization': 'Bearer ' + create_access_token(identity=str(user_id), additional_claims={'role': role})}
+
+        day = (now + timedelta(days=1)).strftime('%Y-%m-%d')
+        client = turfics.app.test_client()
+        hot_paths = [
+            ('slots', lambda: client.get(f'/api/units/{unit_id}/slots?date={day}')),
+            ('availability', lambda: client.get(f'/api/turfs/{turf_id}/availability?date={day}')),
+            ('hold', lambda: client.post('/api/bookings/hold', json={'turf_id': turf_id, 'date': day, 'hour': 3},
+                                         headers=token(player_id, 'user'))),
+            ('hold reaper', lambda: turfics.reap_expired_holds()),
+            ('my-bookings', lambda: client.get('/api/my-bookings?filter=upcoming', headers=token(player_id, 'user'))),
+            ('owner-stats', lambda: client.get('/api/owner/stats', headers=token(owner.id, 'owner'))),
+        ]
+
+        failures = []
+        for name, call in hot_paths:
+            captured = []
+
+            def capture(conn, cursor, statement, parameters, context, executemany):
+                if statement.lstrip().upper().startswith('SELECT') and re.search(r'\bbookings\b', statement):
+                    captured.append((statement, parameters))
+
+            turfics.unit_day_cache.entries.clear()
+            event.listen(db.engine, 'before_cursor_execute', capture)
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):  # routes print debug output
+                    call()
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', capture)
+            db.session.rollback()
+
+            print(f"\n=== {name}: {len(captured)} bookings queries")
+            for statement, parameters in captured:
+                plan = explain(statement, parameters)
+                full_scan = any(p.search(line) for p in FULL_SCAN_PATTERNS for line in plan)
+                print('  ' + ' '.join(statement.split())[:160])
+                for line in plan:
+                    print('      ' + line)
+                if full_scan:
+                    failures.append(name)
+                    print('  !! full scan of bookings')
+
+        if failures:
+            print(f"\nFAILED: full bookings scan in {', '.join(sorted(set(failures)))}")
+            sys.exit(1)
+        print('\nOK: every hot path query uses an index on bookings')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+import math
+
+# Grid bucket spatial index for Turf discovery.
+# The globe is cut into fixed CELL_DEG x CELL_DEG cells and every turf stores the
+# integer id of the cell it sits in (Turf.geo_cell). A "near me" search turns the
+# search circle into one contiguous cell range per grid row, so the database only
+# touches turfs in the surrounding cells instead of the whole catalog.
+
+CELL_DEG = 0.05  # ~5.5 km of latitude per cell
+ROW_STRIDE = 10000  # cell id = row * ROW_STRIDE + col (cols never exceed 7200)
+EARTH_RADIUS_KM = 6371.0
+
+
+def grid_cell(lat, lng):
+    """Return the grid cell id for a coordinate, or None if it is missing"""
+    if lat is None or lng is None:
+        return None
+    lat = min(max(float(lat), -90.0), 90.0)
+    lng = min(max(float(lng), -180.0), 180.0)
+    row = int((lat + 90.0) // CELL_DEG)
+    col = int((lng + 180.0) // CELL_DEG)
+    return row * ROW_STRIDE + col
+
+
+def cell_ranges(lat, lng, radius_km):
+    """List of (min_cell, max_cell) ranges covering the bounding box of a search circle"""
+    lat_delta = radius_km / 111.0
+    # Longitude degrees shrink towards the poles; clamp cos() so we never divide by ~0
+    lng_delta = radius_km / (111.0 * max(math.cos(math.radians(lat)), 0.01))
+
+    row_min = grid_cell(lat - lat_delta, 0) // ROW_STRIDE
+    row_max = grid_cell(lat + lat_delta, 0) // ROW_STRIDE
+    col_min = grid_cell(0, lng - lng_delta) % ROW_STRIDE
+    col_max = grid_cell(0, lng + lng_delta) % ROW_STRIDE
+
+    return [(row * ROW_STRIDE + col_min, row * ROW_STRIDE + col_max)
+            for row in range(row_min, row_max + 1)]
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance between two coordinates in kilometres"""
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + \
+        math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
@@ -0,0 +1,62 @@
+import hashlib
+
+# Idempotency-Key support for retried POSTs.
+# The first request with a given key claims it (add(), so only one of two racing
+# retries wins) and runs; its response is then stored for ttl_seconds. Retries
+# with the same key get that stored response back without running the route again,
+# so a retried hold does not insert another held row. Keys are scoped per user and
+# route, and a retry whose body differs from the original is rejected.
+# Records live in an analytics_cache store (LRUStore per worker, RedisStore shared).
+
+PENDING = 'pending'
+DONE = 'done'
+
+
+def fingerprint(body):
+    return hashlib.sha256(body or b'').hexdigest()
+
+
+class IdempotencyStore:
+    """Claim / finish / release of Idempotency-Key records"""
+
+    def __init__(self, store, ttl_seconds=3600, pending_ttl_seconds=60):
+        self.store = store
+        self.ttl_seconds = ttl_seconds
+        self.pending_ttl_seconds = pending_ttl_seconds  # frees a key whose request died mid-flight
+        self.replays = 0
+
+    def record_key(self, scope, key):
+        return f'idempotency:{scope}:{key}'
+
+    def begin(self, scope, key, request_fingerprint):
+        """Returns (state, record): ('new', None) when this request should run, ('replay', record)
+        with the stored response, ('in_progress', record) while the first request is still running,
+        or ('mismatch', record) when the key was used for a different request body."""
+        record_key = self.record_key(scope, key)
+        claimed = self.store.add(record_key, {'state': PENDING, 'fingerprint': request_fingerprint},
+                                 self.pending_ttl_seconds)
+        if claimed:
+            return 'new', None
+
+        record = self.store.get(record_key)
+        if record is None:  # Expired between add() and get(); let the caller try again
+            return 'in_progress', None
+        if record['fingerprint'] != request_fingerprint:
+            return 'mismatch', record
+        if record['state'] == PENDING:
+            return 'in_progress', record
+        self.replays += 1
+        return 'replay', record
+
+    def finish(self, scope, key, request_fingerprint, status, body, mimetype):
+        self.store.set(self.record_key(scope, key), {
+            'state': DONE,
+            'fingerprint': request_fingerprint,
+            'status': status,
+            'body': body,
+            'mimetype': mimetype
+        }, self.ttl_seconds)
+
+    def release(self, scope, key):
+        """Forget a claimed key (the request failed), so a retry runs for real"""
+        self.store.delete(self.record_key(scope, key))
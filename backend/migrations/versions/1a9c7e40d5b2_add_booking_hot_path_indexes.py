@@ -0,0 +1,28 @@
+"""add composite indexes for booking hot paths
+
+Revision ID: 1a9c7e40d5b2
+Revises: f6b18d3e5a70
+Create Date: 2026-10-18 15:22:48.017395
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1a9c7e40d5b2'
+down_revision = 'f6b18d3e5a70'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_bookings_unit_window', 'bookings', ['turf_unit_id', 'start_time', 'end_time', 'status'], unique=False)
+    op.create_index('ix_bookings_user_start', 'bookings', ['user_id', 'start_time'], unique=False)
+    op.create_index('ix_bookings_turf_start', 'bookings', ['turf_id', 'start_time'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_bookings_turf_start', table_name='bookings')
+    op.drop_index('ix_bookings_user_start', table_name='bookings')
+    op.drop_index('ix_bookings_unit_window', table_name='bookings')
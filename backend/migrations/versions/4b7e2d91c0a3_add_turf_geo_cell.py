@@ -0,0 +1,39 @@
+"""add geo_cell grid bucket to turfs
+
+Revision ID: 4b7e2d91c0a3
+Revises: 28798ee50a49
+Create Date: 2026-10-18 10:12:41.530118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from geo import grid_cell
+
+
+# revision identifiers, used by Alembic.
+revision = '4b7e2d91c0a3'
+down_revision = '28798ee50a49'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('turfs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('geo_cell', sa.Integer(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_turfs_geo_cell'), ['geo_cell'], unique=False)
+
+    # Backfill the grid bucket for existing turfs
+    conn = op.get_bind()
+    turfs = conn.execute(sa.text('SELECT id, latitude, longitude FROM turfs')).fetchall()
+    for turf_id, lat, lng in turfs:
+        conn.execute(
+            sa.text('UPDATE turfs SET geo_cell = :cell WHERE id = :id'),
+            {'cell': grid_cell(lat, lng), 'id': turf_id}
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('turfs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_turfs_geo_cell'))
+        batch_op.drop_column('geo_cell')
@@ -0,0 +1,54 @@
+"""add owner_daily_stats rollup for the owner dashboard
+
+Revision ID: 5e8a1b3c7f90
+Revises: 7d3f2c9a1e56
+Create Date: 2026-10-18 17:10:44.215930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e8a1b3c7f90'
+down_revision = '7d3f2c9a1e56'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('owner_daily_stats',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('turf_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('sport_type', sa.String(length=50), nullable=False),
+    sa.Column('booking_source', sa.String(length=20), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('hour', sa.Integer(), nullable=False),
+    sa.Column('booking_count', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['turf_id'], ['turfs.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('turf_id', 'day', 'sport_type', 'booking_source', 'status', 'hour', name='uq_owner_daily_stats_key')
+    )
+
+    # Backfill from existing bookings (same grouping as `flask rebuild-owner-stats`)
+    conn = op.get_bind()
+    if conn.dialect.name == 'postgresql':
+        day, hour = 'CAST(b.start_time AS DATE)', 'CAST(EXTRACT(HOUR FROM b.start_time) AS INTEGER)'
+    else:
+        day, hour = 'date(b.start_time)', "CAST(strftime('%H', b.start_time) AS INTEGER)"
+    conn.execute(sa.text(
+        "INSERT INTO owner_daily_stats (turf_id, day, sport_type, booking_source, status, hour, booking_count, revenue) "
+        f"SELECT b.turf_id, {day}, COALESCE(g.sport_type, 'Other'), COALESCE(b.booking_source, 'online'), "
+        f"COALESCE(b.status, 'hold'), {hour}, COUNT(b.id), COALESCE(SUM(b.total_price), 0) "
+        "FROM bookings b "
+        "LEFT JOIN turf_units u ON b.turf_unit_id = u.id "
+        "LEFT JOIN turf_games g ON u.turf_game_id = g.id "
+        f"GROUP BY b.turf_id, {day}, COALESCE(g.sport_type, 'Other'), COALESCE(b.booking_source, 'online'), "
+        f"COALESCE(b.status, 'hold'), {hour}"
+    ))
+
+
+def downgrade():
+    op.drop_table('owner_daily_stats')
@@ -0,0 +1,55 @@
+"""backfill bookings.turf_id, make it required and index turfs.owner_id
+
+Revision ID: 7d3f2c9a1e56
+Revises: 1a9c7e40d5b2
+Create Date: 2026-10-18 16:05:12.408213
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d3f2c9a1e56'
+down_revision = '1a9c7e40d5b2'
+branch_labels = None
+depends_on = None
+
+LIVE_HOLD_PREDICATE = "status IN ('hold', 'held')"
+
+
+def upgrade():
+    # Older bookings (and the player booking route) never set turf_id; derive it from the unit
+    op.execute(sa.text(
+        "UPDATE bookings SET turf_id = ("
+        " SELECT turf_games.turf_id FROM turf_units"
+        " JOIN turf_games ON turf_units.turf_game_id = turf_games.id"
+        " WHERE turf_units.id = bookings.turf_unit_id"
+        ") WHERE turf_id IS NULL"
+    ))
+
+    # SQLite rebuilds the table for the ALTER; recreate the partial index ourselves so it keeps its WHERE
+    op.drop_index('ix_bookings_hold_expires_at', table_name='bookings')
+    with op.batch_alter_table('bookings', schema=None) as batch_op:
+        batch_op.alter_column('turf_id', existing_type=sa.Integer(), nullable=False)
+    op.create_index(
+        'ix_bookings_hold_expires_at', 'bookings', ['expires_at'], unique=False,
+        postgresql_where=sa.text(LIVE_HOLD_PREDICATE),
+        sqlite_where=sa.text(LIVE_HOLD_PREDICATE)
+    )
+
+    # Owner queries now go bookings.turf_id -> turfs.owner_id
+    op.create_index(op.f('ix_turfs_owner_id'), 'turfs', ['owner_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_turfs_owner_id'), table_name='turfs')
+
+    op.drop_index('ix_bookings_hold_expires_at', table_name='bookings')
+    with op.batch_alter_table('bookings', schema=None) as batch_op:
+        batch_op.alter_column('turf_id', existing_type=sa.Integer(), nullable=True)
+    op.create_index(
+        'ix_bookings_hold_expires_at', 'bookings', ['expires_at'], unique=False,
+        postgresql_where=sa.text(LIVE_HOLD_PREDICATE),
+        sqlite_where=sa.text(LIVE_HOLD_PREDICATE)
+    )
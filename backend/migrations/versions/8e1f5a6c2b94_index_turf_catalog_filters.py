@@ -0,0 +1,32 @@
+"""index turf_games.turf_id and turf_units.turf_game_id for catalog filters
+
+Revision ID: 8e1f5a6c2b94
+Revises: 4b7e2d91c0a3
+Create Date: 2026-10-18 11:03:17.204581
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e1f5a6c2b94'
+down_revision = '4b7e2d91c0a3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('turf_games', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_turf_games_turf_id'), ['turf_id'], unique=False)
+
+    with op.batch_alter_table('turf_units', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_turf_units_turf_game_id'), ['turf_game_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('turf_units', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_turf_units_turf_game_id'))
+
+    with op.batch_alter_table('turf_games', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_turf_games_turf_id'))
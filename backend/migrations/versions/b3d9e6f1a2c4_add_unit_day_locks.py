@@ -0,0 +1,33 @@
+"""add unit_day_locks to serialize booking writes per unit and day
+
+Revision ID: b3d9e6f1a2c4
+Revises: 5e8a1b3c7f90
+Create Date: 2026-10-18 18:02:37.514208
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3d9e6f1a2c4'
+down_revision = '5e8a1b3c7f90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Rows are created on demand by the first booking write of each unit-day
+    op.create_table('unit_day_locks',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('turf_unit_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['turf_unit_id'], ['turf_units.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('turf_unit_id', 'day', name='uq_unit_day_locks_unit_day')
+    )
+
+
+def downgrade():
+    op.drop_table('unit_day_locks')
@@ -0,0 +1,66 @@
+"""add denormalized listing summary columns to turfs
+
+Revision ID: c52d0e7a9f18
+Revises: 8e1f5a6c2b94
+Create Date: 2026-10-18 11:47:52.918340
+
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c52d0e7a9f18'
+down_revision = '8e1f5a6c2b94'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('turfs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('min_price', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('sports', sa.String(length=200), nullable=True))
+        batch_op.add_column(sa.Column('unit_count', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('games_summary', sa.Text(), nullable=True))
+
+    # Backfill the summary from the current games and units
+    conn = op.get_bind()
+    turf_ids = [row[0] for row in conn.execute(sa.text('SELECT id FROM turfs')).fetchall()]
+    for turf_id in turf_ids:
+        games = conn.execute(sa.text(
+            'SELECT id, sport_type, game_category, default_price, slot_duration, is_active '
+            'FROM turf_games WHERE turf_id = :turf_id AND is_active = :active ORDER BY id'
+        ), {'turf_id': turf_id, 'active': True}).fetchall()
+        unit_count = conn.execute(sa.text(
+            'SELECT COUNT(turf_units.id) FROM turf_units '
+            'JOIN turf_games ON turf_units.turf_game_id = turf_games.id '
+            "WHERE turf_games.turf_id = :turf_id AND turf_games.is_active = :active AND turf_units.status = 'active'"
+        ), {'turf_id': turf_id, 'active': True}).scalar()
+
+        conn.execute(sa.text(
+            'UPDATE turfs SET min_price = :min_price, sports = :sports, unit_count = :unit_count, '
+            'games_summary = :games_summary WHERE id = :id'
+        ), {
+            'id': turf_id,
+            'min_price': min((g.default_price for g in games), default=0),
+            'sports': ','.join(sorted(set(g.sport_type for g in games))),
+            'unit_count': unit_count or 0,
+            'games_summary': json.dumps([{
+                'id': g.id,
+                'sport_type': g.sport_type,
+                'game_category': g.game_category,
+                'default_price': g.default_price,
+                'slot_duration': g.slot_duration,
+                'is_active': bool(g.is_active)
+            } for g in games])
+        })
+
+
+def downgrade():
+    with op.batch_alter_table('turfs', schema=None) as batch_op:
+        batch_op.drop_column('games_summary')
+        batch_op.drop_column('unit_count')
+        batch_op.drop_column('sports')
+        batch_op.drop_column('min_price')
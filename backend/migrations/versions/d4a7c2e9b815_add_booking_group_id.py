@@ -0,0 +1,28 @@
+"""add group_id to bookings for bookings created together
+
+Revision ID: d4a7c2e9b815
+Revises: b3d9e6f1a2c4
+Create Date: 2026-10-18 18:41:09.627193
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4a7c2e9b815'
+down_revision = 'b3d9e6f1a2c4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('bookings', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('group_id', sa.String(length=36), nullable=True))
+        batch_op.create_index(batch_op.f('ix_bookings_group_id'), ['group_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('bookings', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_bookings_group_id'))
+        batch_op.drop_column('group_id')
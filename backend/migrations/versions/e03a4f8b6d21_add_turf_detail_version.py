@@ -0,0 +1,26 @@
+"""add detail_version to turfs
+
+Revision ID: e03a4f8b6d21
+Revises: c52d0e7a9f18
+Create Date: 2026-10-18 12:31:06.772415
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e03a4f8b6d21'
+down_revision = 'c52d0e7a9f18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('turfs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('detail_version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade():
+    with op.batch_alter_table('turfs', schema=None) as batch_op:
+        batch_op.drop_column('detail_version')
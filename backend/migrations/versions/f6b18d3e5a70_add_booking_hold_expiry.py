@@ -0,0 +1,51 @@
+"""add expires_at to bookings with a partial index on live holds
+
+Revision ID: f6b18d3e5a70
+Revises: e03a4f8b6d21
+Create Date: 2026-10-18 14:05:29.381642
+
+"""
+from datetime import datetime, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f6b18d3e5a70'
+down_revision = 'e03a4f8b6d21'
+branch_labels = None
+depends_on = None
+
+HOLD_EXPIRY_SECONDS = 480
+
+
+def upgrade():
+    with op.batch_alter_table('bookings', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('expires_at', sa.DateTime(), nullable=True))
+
+    op.create_index(
+        'ix_bookings_hold_expires_at', 'bookings', ['expires_at'], unique=False,
+        postgresql_where=sa.text("status IN ('hold', 'held')"),
+        sqlite_where=sa.text("status IN ('hold', 'held')")
+    )
+
+    # Backfill existing holds; the reaper expires the lapsed ones on its next sweep
+    conn = op.get_bind()
+    holds = conn.execute(sa.text(
+        "SELECT id, created_at FROM bookings WHERE status IN ('hold', 'held') AND created_at IS NOT NULL"
+    )).fetchall()
+    for booking_id, created_at in holds:
+        if isinstance(created_at, str):  # SQLite returns raw strings here
+            created_at = datetime.fromisoformat(created_at)
+        conn.execute(
+            sa.text('UPDATE bookings SET expires_at = :expires_at WHERE id = :id'),
+            {'expires_at': created_at + timedelta(seconds=HOLD_EXPIRY_SECONDS), 'id': booking_id}
+        )
+
+
+def downgrade():
+    op.drop_index('ix_bookings_hold_expires_at', table_name='bookings')
+
+    with op.batch_alter_table('bookings', schema=None) as batch_op:
+        batch_op.drop_column('expires_at')
@@ -44,7 +44,8 @@ class Turf(db.Model):
     location = db.Column(db.String(500), nullable=False)
     latitude = db.Column(db.Float)
     longitude = db.Column(db.Float)
-    owner_id = db.Column(db.Integer, db.ForeignKey('users.id'))
+    geo_cell = db.Column(db.Integer, index=True)  # Grid bucket for "near me" lookups (see geo.py)
+    owner_id = db.Column(db.Integer, db.ForeignKey('users.id'), index=True)
     
     # Venue Details
     amenities = db.Column(db.String(500))  # "Parking, WiFi, Changing Rooms"
@@ -60,6 +61,13 @@ class Turf(db.Model):
     status = db.Column(db.String(20), default='active')  # active, inactive, maintenance
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # Listing Summary (Denormalized from games/units, kept up to date by the game & unit routes)
+    min_price = db.Column(db.Float, default=0.0)
+    sports = db.Column(db.String(200), default='')  # "Badminton,Football"
+    unit_count = db.Column(db.Integer, default=0)
+    games_summary = db.Column(db.Text, default='[]')  # JSON list of active games for listing cards
+    detail_version = db.Column(db.Integer, default=1, nullable=False)  # Bumped on every turf/game/unit/image change (ETag)
+    
     # Relationships
     games = db.relationship('TurfGame', backref='turf', lazy=True, cascade='all, delete-orphan')
 
@@ -67,7 +75,7 @@ class TurfGame(db.Model):
     """Game/Sport Configuration Level"""
     __tablename__ = 'turf_games'
     id = db.Column(db.Integer, primary_key=True)
-    turf_id = db.Column(db.Integer, db.ForeignKey('turfs.id'), nullable=False)
+    turf_id = db.Column(db.Integer, db.ForeignKey('turfs.id'), nullable=False, index=True)
     
     # Sport Configuration
     sport_type = db.Column(db.String(50), nullable=False)  # Football, Badminton, Tennis, Cricket, Swimming
@@ -92,7 +100,7 @@ class TurfUnit(db.Model):
     """Bookable Unit Level - Pitch/Court/Pool/Space"""
     __tablename__ = 'turf_units'
     id = db.Column(db.Integer, primary_key=True)
-    turf_game_id = db.Column(db.Integer, db.ForeignKey('turf_games.id'), nullable=False)
+    turf_game_id = db.Column(db.Integer, db.ForeignKey('turf_games.id'), nullable=False, index=True)
     
     # Unit Details
     name = db.Column(db.String(100), nullable=False)  # "Court 1", "Pitch A", "Pool 1"
@@ -148,6 +156,10 @@ class Team(db.Model):
     # Relationships
     captain = db.relationship('User', foreign_keys=[captain_id], backref='teams_captained')
     
+# Predicate of the partial hold index. Queries must repeat it literally (not as bound
+# parameters) for the planner to match the index.
+LIVE_HOLD_PREDICATE = "status IN ('hold', 'held')"
+
 class Booking(db.Model):
     """Bookings are ALWAYS at the Unit level"""
     __tablename__ = 'bookings'
@@ -155,7 +167,7 @@ class Booking(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     turf_unit_id = db.Column(db.Integer, db.ForeignKey('turf_units.id'), nullable=False)  # Changed from turf_id
     # Relationship optimization
-    turf_id = db.Column(db.Integer, db.ForeignKey('turfs.id'), nullable=True) # Denormalized for faster querying (Nullable for migration compatibility)
+    turf_id = db.Column(db.Integer, db.ForeignKey('turfs.id'), nullable=False) # Denormalized for faster querying (always the unit's turf)
     
     # Booking Details
     start_time = db.Column(db.DateTime, nullable=False)
@@ -164,8 +176,8 @@ class Booking(db.Model):
     # Pricing
     total_price = db.Column(db.Float, nullable=False)
     
-    # Status Flow: HOLD → CONFIRMED → COMPLETED / CANCELLED
-    status = db.Column(db.String(20), default='hold')  # hold, confirmed, completed, cancelled
+    # Status Flow: HOLD → CONFIRMED → COMPLETED / CANCELLED (or HOLD → EXPIRED via the hold reaper)
+    status = db.Column(db.String(20), default='hold')  # hold, confirmed, completed, cancelled, expired
     
     # Payment & Source
     payment_status = db.Column(db.String(20), default='pending')  # pending, paid, refunded, partial
@@ -176,10 +188,60 @@ class Booking(db.Model):
     guest_name = db.Column(db.String(100))
     guest_phone = db.Column(db.String(20))
     
+    # Hold Expiry: set while the booking is an unpaid hold, cleared once it moves on
+    expires_at = db.Column(db.DateTime)
+
+    # Shared by bookings created together in one request (a recurring series, a bulk block, a combined booking)
+    group_id = db.Column(db.String(36), index=True)
+    
     # Metadata
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        # Hot paths: slot/conflict overlap checks, "my bookings", per-turf owner queries
+        db.Index('ix_bookings_unit_window', 'turf_unit_id', 'start_time', 'end_time', 'status'),
+        db.Index('ix_bookings_user_start', 'user_id', 'start_time'),
+        db.Index('ix_bookings_turf_start', 'turf_id', 'start_time'),
+        # Partial index: only live holds are indexed, for the hold reaper
+        db.Index('ix_bookings_hold_expires_at', 'expires_at',
+                 postgresql_where=db.text(LIVE_HOLD_PREDICATE),
+                 sqlite_where=db.text(LIVE_HOLD_PREDICATE)),
+    )
+
+class OwnerDailyStats(db.Model):
+    """Booking rollup behind the owner dashboard: one row per turf, day, sport, source, status and hour.
+    Kept in step with bookings by app.record_booking_stats; rebuild with `flask rebuild-owner-stats`"""
+    __tablename__ = 'owner_daily_stats'
+    id = db.Column(db.Integer, primary_key=True)
+    turf_id = db.Column(db.Integer, db.ForeignKey('turfs.id'), nullable=False)
+    day = db.Column(db.Date, nullable=False) # Date of Booking.start_time
+    sport_type = db.Column(db.String(50), nullable=False)
+    booking_source = db.Column(db.String(20), nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    hour = db.Column(db.Integer, nullable=False) # Hour of Booking.start_time (hourly histogram)
+
+    booking_count = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0) # Sum of total_price, whatever the status
+
+    __table_args__ = (
+        db.UniqueConstraint('turf_id', 'day', 'sport_type', 'booking_source', 'status', 'hour',
+                            name='uq_owner_daily_stats_key'),
+    )
+
+class UnitDayLock(db.Model):
+    """Lock row per unit and day. Booking writes take its row lock (app.lock_unit_days) before
+    checking for conflicts, so two requests for the same slot can not both pass the check."""
+    __tablename__ = 'unit_day_locks'
+    id = db.Column(db.Integer, primary_key=True)
+    turf_unit_id = db.Column(db.Integer, db.ForeignKey('turf_units.id', ondelete='CASCADE'), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    version = db.Column(db.Integer, nullable=False, default=0) # Bumped by every write that takes the lock
+
+    __table_args__ = (
+        db.UniqueConstraint('turf_unit_id', 'day', name='uq_unit_day_locks_unit_day'),
+    )
+
 class Coach(db.Model):
     __tablename__ = 'coaches'
     id = db.Column(db.Integer, primary_key=True)
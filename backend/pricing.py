@@ -0,0 +1,92 @@
+import json
+import numpy as np
+
+# Dynamic pricing engine for TurfGame.pricing_rules.
+# Rules are JSON such as
+#     {"weekend_multiplier": 1.2, "peak_hour_multiplier": 1.5, "peak_start": 18, "peak_end": 22}
+# and compile into a rate multiplier for each of the 168 hours of the week
+# (Monday 00:00 first; multipliers compound, so a weekend peak hour is 1.2 x 1.5).
+# A slot costs the hourly rate integrated over its minutes, so a slot straddling
+# the start of peak hours pays peak rate for the peak part only. Integrals come
+# from a cumulative table over the week, which prices a whole grid of slots in
+# one vectorized pass.
+
+MINUTES_PER_WEEK = 7 * 24 * 60
+WEEKEND_DAYS = (5, 6)  # Saturday, Sunday
+
+
+class PricingRules:
+    """Compiled pricing rules of one game"""
+
+    def __init__(self, multipliers):
+        self.multipliers = np.asarray(multipliers, dtype=float)  # per hour of the week
+        # weighted minutes from the start of the week to the start of each hour
+        self.cumulative = np.concatenate([[0.0], np.cumsum(self.multipliers * 60)])
+        self.week_total = self.cumulative[-1]
+
+    def _weighted_minutes(self, minute_of_week):
+        """Multiplier-weighted minutes from the start of the week (any non-negative minute)"""
+        weeks, minute = np.divmod(minute_of_week, MINUTES_PER_WEEK)
+        hour = (minute // 60).astype(int)
+        return weeks * self.week_total + self.cumulative[hour] + (minute - hour * 60) * self.multipliers[hour]
+
+    def price(self, hourly_rate, starts, ends):
+        """Prices of the slots [starts[i], ends[i]) at a base hourly rate, as a list of floats"""
+        if not len(starts):
+            return []
+        start_minutes = np.array([s.weekday() * 1440 + s.hour * 60 + s.minute + s.second / 60 for s in starts])
+        durations = np.array([(e - s).total_seconds() / 60 for s, e in zip(starts, ends)])
+        weighted = self._weighted_minutes(start_minutes + durations) - self._weighted_minutes(start_minutes)
+        return [round(float(p), 2) for p in weighted * (hourly_rate / 60.0)]
+
+
+def compile_rules(rules_text):
+    """Parse a pricing_rules JSON string. Raises ValueError on malformed rules."""
+    rules = json.loads(rules_text) if rules_text else {}
+    if not isinstance(rules, dict):
+        raise ValueError('pricing_rules must be a JSON object')
+
+    multipliers = np.ones((7, 24))
+    weekend = float(rules.get('weekend_multiplier', 1))
+    multipliers[list(WEEKEND_DAYS), :] *= weekend
+
+    peak = float(rules.get('peak_hour_multiplier', 1))
+    if peak != 1:
+        peak_start = int(rules.get('peak_start', 18))
+        peak_end = int(rules.get('peak_end', 22))
+        if not (0 <= peak_start <= 24 and 0 <= peak_end <= 24):
+            raise ValueError('peak_start/peak_end must be hours between 0 and 24')
+        hours = np.arange(24)
+        if peak_start < peak_end:
+            in_peak = (hours >= peak_start) & (hours < peak_end)
+        else:  # Overnight peak, e.g. 20 -> 2
+            in_peak = (hours >= peak_start) | (hours < peak_end)
+        multipliers[:, in_peak] *= peak
+
+    if not np.isfinite(multipliers).all():
+        raise ValueError('multipliers must be finite numbers')
+    if (multipliers <= 0).any():
+        raise ValueError('multipliers must be positive')
+    return PricingRules(multipliers.ravel())
+
+
+class PricingCache:
+    """Compiled rules per game id, recompiled when the game's pricing_rules text changes
+    (so edits made through another worker are picked up on the next lookup too)"""
+
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, game):
+        entry = self.entries.get(game.id)
+        if entry is None or entry[0] != game.pricing_rules:
+            try:
+                compiled = compile_rules(game.pricing_rules)
+            except (ValueError, TypeError):
+                compiled = compile_rules(None)  # Bad rules in the database never break pricing
+            entry = (game.pricing_rules, compiled)
+            self.entries[game.id] = entry
+        return entry[1]
+
+    def invalidate(self, game_id):
+        self.entries.pop(game_id, None)
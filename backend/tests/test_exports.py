@@ -0,0 +1,31 @@
+import csv
+import io
+import zipfile
+
+from exports import stream_csv, stream_xlsx
+
+
+def read_csv(body):
+    return list(csv.reader(io.StringIO(b''.join(body).decode('utf-8'))))
+
+
+def read_sheet(body):
+    with zipfile.ZipFile(io.BytesIO(b''.join(body))) as workbook:
+        return workbook.read('xl/worksheets/sheet1.xml').decode('utf-8')
+
+
+def test_csv_escapes_formula_cells():
+    rows = read_csv(stream_csv(['guest'], [['=cmd|x'], ['+1'], ['-2'], ['@SUM(A1)'], ['\tx'], ['\rx']]))
+    assert [row[0] for row in rows[1:]] == ["'=cmd|x", "'+1", "'-2", "'@SUM(A1)", "'\tx", "'\rx"]
+
+
+def test_csv_keeps_plain_text_and_numbers():
+    rows = read_csv(stream_csv(['guest', 'price'], [['Asha', -150.0], ['a=b', 0]]))
+    assert rows[1:] == [['Asha', '-150.0'], ['a=b', '0']]
+
+
+def test_xlsx_escapes_formula_cells():
+    sheet = read_sheet(stream_xlsx(['guest', 'price'], [['=cmd|x', -150.0], ['Asha', 10]]))
+    assert "<t>'=cmd|x</t>" in sheet
+    assert '<v>-150.0</v>' in sheet
+    assert '<t>Asha</t>' in sheet
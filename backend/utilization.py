@@ -0,0 +1,68 @@
+import numpy as np
+
+# Vectorized occupancy math for the utilization heatmap.
+# Booking intervals are minutes from the start of the report range. The occupied
+# time up to t is G(t) = sum(max(t - start, 0)) - sum(max(t - end, 0)), which is
+# evaluated at every edge at once with sorted starts/ends and cumulative sums;
+# occupied minutes per segment are the differences of G. The range is cut at
+# every hour and at each opening/closing time, so intervals that straddle hour
+# boundaries are split across the hours they cover and closed time is dropped.
+
+MINUTES_PER_DAY = 24 * 60
+HOURS_PER_WEEK = 7 * 24
+
+
+def occupied_minutes(starts, ends, edges):
+    """Overlap of intervals [starts, ends) with each bucket [edges[i], edges[i+1])"""
+    starts = np.sort(np.asarray(starts, dtype=float))
+    ends = np.sort(np.asarray(ends, dtype=float))
+    edges = np.asarray(edges, dtype=float)
+
+    start_sums = np.concatenate([[0.0], np.cumsum(starts)])
+    end_sums = np.concatenate([[0.0], np.cumsum(ends)])
+    started = np.searchsorted(starts, edges, side='right')
+    ended = np.searchsorted(ends, edges, side='right')
+
+    covered = (started * edges - start_sums[started]) - (ended * edges - end_sums[ended])
+    return np.diff(covered)
+
+
+def is_open(minute_of_day, open_minute, close_minute):
+    """Vectorized: is the venue open at these minutes of the day (closing at or before
+    opening wraps past midnight, equal times mean open all day)"""
+    minute_of_day = np.asarray(minute_of_day)
+    if close_minute == open_minute:
+        return np.ones(minute_of_day.shape, dtype=bool)
+    if close_minute > open_minute:
+        return (minute_of_day >= open_minute) & (minute_of_day < close_minute)
+    return (minute_of_day >= open_minute) | (minute_of_day < close_minute)
+
+
+def hourly_open_occupancy(starts, ends, days, open_minute, close_minute):
+    """Occupied and open minutes of every hour of `days` consecutive days, counting only
+    time inside opening hours. Returns two arrays of days * 24 values."""
+    # Cut the range at every hour and at each day's opening/closing time, so every
+    # segment is either wholly open or wholly closed
+    day_offsets = np.arange(days) * MINUTES_PER_DAY
+    cuts = np.concatenate([np.arange(days * 24 + 1) * 60,
+                           day_offsets + open_minute, day_offsets + close_minute])
+    edges = np.unique(np.clip(cuts, 0, days * MINUTES_PER_DAY))
+
+    segment_start = edges[:-1]
+    segment_open = is_open(segment_start % MINUTES_PER_DAY, open_minute, close_minute)
+    segment_hour = segment_start // 60
+    open_time = np.where(segment_open, np.diff(edges), 0)
+    busy_time = np.where(segment_open, occupied_minutes(starts, ends, edges), 0)
+
+    occupied = np.bincount(segment_hour, weights=busy_time, minlength=days * 24)
+    available = np.bincount(segment_hour, weights=open_time, minlength=days * 24)
+    # Overlapping bookings on a unit count an hour as full at most
+    return np.minimum(occupied, available), available
+
+
+def hour_of_week_totals(values, first_weekday):
+    """Fold per-hour values of consecutive days (starting on first_weekday, Monday = 0)
+    into 168 hour-of-week sums"""
+    hours = np.arange(len(values))
+    hour_of_week = ((first_weekday + hours // 24) % 7) * 24 + hours % 24
+    return np.bincount(hour_of_week, weights=values, minlength=HOURS_PER_WEEK)
@@ -55,10 +55,9 @@ const Dashboard = () => {
 
             // If Owner and has pending items, fetch the details immediately
             if (currentRole === 'owner' && data.bookings_breakdown?.pending > 0) {
-                const bookingRes = await fetch(`${API_URL}/api/owner/bookings`, { headers });
+                const bookingRes = await fetch(`${API_URL}/api/owner/bookings?status=pending&limit=50`, { headers });
                 if (bookingRes.ok) {
-                    const allBookings = await bookingRes.json();
-                    const pending = allBookings.filter(b => b.status === 'pending');
+                    const pending = (await bookingRes.json()).bookings;
                     setPendingBookings(pending);
                     if (pending.length > 0) setShowPendingModal(true);
                 }
@@ -196,7 +196,27 @@ const TurfDetails = () => {
         }
 
         const totalHours = selectedSlots.length * 0.5;
-        const totalPrice = selectedSlots.reduce((a, s) => a + s.price, 0);
+        let totalPrice = selectedSlots.reduce((a, s) => a + s.price, 0);
+
+        // Authoritative price from the server (the booking itself is priced server-side too)
+        try {
+            const quoteRes = await fetch(`${API_URL}/api/quote`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({
+                    items: batches.map(batch => ({
+                        turf_unit_id: selectedUnit.id,
+                        start_time: batch[0].start_iso,
+                        end_time: batch[batch.length - 1].end_iso
+                    }))
+                })
+            });
+            if (quoteRes.ok) {
+                totalPrice = (await quoteRes.json()).total_price;
+            }
+        } catch (e) {
+            console.error('Quote failed, showing slot prices', e);
+        }
 
 
 
@@ -213,48 +233,44 @@ const TurfDetails = () => {
         let errors = [];
 
         try {
-            for (const batch of batches) {
-                const start = batch[0].start_iso;
-                const end = batch[batch.length - 1].end_iso;
-                const batchPrice = batch.reduce((a, s) => a + s.price, 0);
-
-                const response = await fetch(`${API_URL}/api/bookings`, {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json',
-                        'Authorization': `Bearer ${token}`
-                    },
-                    body: JSON.stringify({
+            // One combined booking for every batch: all of them are reserved or none is
+            const response = await fetch(`${API_URL}/api/bookings/basket`, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    'Authorization': `Bearer ${token}`
+                },
+                body: JSON.stringify({
+                    items: batches.map(batch => ({
                         turf_unit_id: selectedUnit.id,
-                        start_time: start,
-                        end_time: end,
-                        total_price: batchPrice
-                    }),
-                });
-
-                if (response.ok) {
-                    const data = await response.json();
-                    successInfo.push({
-                        id: data.booking_id,
-                        start_time: start,
-                        end_time: end,
-                        price: batchPrice
-                    });
-                } else {
-                    const err = await response.json();
-
-                    // Specific fix for execution: Check for token expiration
-                    if (response.status === 401 || err.message === 'Token has expired') {
-                        setBookingStatus('idle');
-                        await showWarning('Session Expired', 'Your session has expired. Please login again.');
-                        localStorage.removeItem('token');
-                        localStorage.removeItem('user');
-                        navigate('/login');
-                        return; // Stop booking loop
-                    }
+                        start_time: batch[0].start_iso,
+                        end_time: batch[batch.length - 1].end_iso
+                    }))
+                }),
+            });
 
-                    errors.push(err.message || 'Unknown error');
+            if (response.ok) {
+                const data = await response.json();
+                successInfo = data.bookings.map(b => ({
+                    id: b.booking_id,
+                    start_time: b.start_time,
+                    end_time: b.end_time,
+                    price: b.price
+                }));
+            } else {
+                const err = await response.json();
+
+                // Specific fix for execution: Check for token expiration
+                if (response.status === 401 || err.message === 'Token has expired') {
+                    setBookingStatus('idle');
+                    await showWarning('Session Expired', 'Your session has expired. Please login again.');
+                    localStorage.removeItem('token');
+                    localStorage.removeItem('user');
+                    navigate('/login');
+                    return;
                 }
+
+                errors.push(err.message || 'Unknown error');
             }
 
             if (successInfo.length > 0) {